@@ -3,15 +3,31 @@ import requests
 import time
 import os
 import json
+import re
+import socket
 import locale
-from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor
+import string
+import tempfile
+import threading
+from itertools import islice
+from collections import OrderedDict, namedtuple
+from urllib.parse import urlsplit
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError, ReadTimeoutError, ResponseError
 from urllib3.util.retry import Retry
 
+# orjson é opcional: mais rápido para as respostas e o cache em disco, com fallback para o json padrão
+try:
+    from orjson import loads as json_loads, dumps as json_dumps
+except ImportError:
+    json_loads = json.loads
+    def json_dumps(obj): return json.dumps(obj).encode("utf-8")
+
 from ulauncher.api.client.Extension import Extension
 from ulauncher.api.client.EventListener import EventListener
-from ulauncher.api.shared.event import KeywordQueryEvent, PreferencesUpdateEvent
+from ulauncher.api.shared.event import KeywordQueryEvent, PreferencesEvent, PreferencesUpdateEvent
 from ulauncher.api.shared.item.ExtensionResultItem import ExtensionResultItem
 from ulauncher.api.shared.item.ExtensionSmallResultItem import ExtensionSmallResultItem
 from ulauncher.api.shared.action.RenderResultListAction import RenderResultListAction
@@ -20,263 +36,564 @@ from ulauncher.api.shared.action.OpenUrlAction import OpenUrlAction
 logger = logging.getLogger(__name__)
 
 CACHE_TTL = 600
+CACHE_MIN_TTL = 60
+CACHE_STALE_TTL = 1800
+MAX_AGE_RE = re.compile(r"max-age=(\d+)")
 CACHE_FILE = "cache_weather.json"
+WEATHER_CACHE_SIZE = 128
+GEOCODE_CACHE_SIZE = 256
+GEOCODE_TTL = 86400
+GEOCODE_MISS_TTL = 60
+SEARCH_TIMEOUT = 2.5
+# (conexão, leitura): um host inacessível falha em 1,5 s (conexão não é repetida) sem encurtar
+# o tempo de resposta; uma leitura travada custa no máximo 2 × 5 s (uma nova tentativa)
+HTTP_TIMEOUT = (1.5, 5)
+IP_TIMEOUT = (1.5, 2)
+# Localização por IP muda pouco, mas pode mudar (notebook em outra rede). Medido no relógio
+# de parede: o monotônico para durante a suspensão, justamente quando se troca de rede
+GEO_TTL = 900
+IP_LOCATION_APIS = ("https://ip-api.com/json/", "https://freeipapi.com/api/json")
+WARM_HOSTS = ("api.open-meteo.com", "geocoding-api.open-meteo.com")
+GEOCODING_URL = "https://geocoding-api.open-meteo.com/v1/search"
+FORECAST_URL = (
+    # 4 casas decimais (~11 m) bastam para a API e encurtam a URL
+    "https://api.open-meteo.com/v1/forecast?latitude={:.4f}&longitude={:.4f}"
+    "&daily=temperature_2m_max,temperature_2m_min&forecast_days=3&current_weather=true&timezone=auto"
+)
+
+class KeepAliveAdapter(HTTPAdapter):
+    # SO_KEEPALIVE evita que conexões ociosas do pool sejam derrubadas em silêncio entre consultas
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["socket_options"] = HTTPConnection.default_socket_options + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+        super().init_poolmanager(*args, **kwargs)
 
 def create_session():
     session = requests.Session()
-    retries = Retry(total=2, backoff_factor=0.3, status_forcelist=[500, 502, 503, 504])
-    adapter = HTTPAdapter(max_retries=retries)
+    # GET já está entre os métodos repetidos por padrão; allowed_methods só existe a partir do urllib3 1.26
+    # Retry-After de um 503 faria o urllib3 dormir dentro da consulta (sem limite do timeout de leitura)
+    # connect=0: sem rede ou host fora do ar não multiplica o timeout de conexão;
+    # read=1 ainda recupera uma conexão keep-alive derrubada pelo servidor
+    retry_args = dict(total=2, connect=0, read=1, backoff_factor=0.1, status_forcelist=[500, 502, 503, 504],
+                      respect_retry_after_header=False)
+    try:
+        # Jitter evita que várias instâncias repitam as requisições em sincronia (urllib3 >= 2.0)
+        retries = Retry(backoff_jitter=0.1, **retry_args)
+    except TypeError:
+        # urllib3 < 2.0: sem jitter; os demais argumentos são aceitos também pelo urllib3 1.x
+        retries = Retry(**retry_args)
+    # Poucos hosts, várias threads: um pool por host com conexões keep-alive reaproveitadas
+    adapter = KeepAliveAdapter(pool_connections=4, pool_maxsize=8, max_retries=retries)
     session.mount("http://", adapter)
     session.mount("https://", adapter)
+    session.headers.update({"User-Agent": "UWeather/1.0"})
     return session
 
+class CircuitBreaker:
+    # Após falhas seguidas de um host, deixa de consultá-lo por um intervalo
+    def __init__(self, threshold=3, cooldown=60):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = {}
+        self.open_until = {}
+
+    def allow(self, host):
+        return time.monotonic() >= self.open_until.get(host, 0)
+
+    def record(self, host, ok):
+        if ok:
+            self.failures.pop(host, None)
+            return
+        self.failures[host] = self.failures.get(host, 0) + 1
+        if self.failures[host] >= self.threshold:
+            self.open_until[host] = time.monotonic() + self.cooldown
+            self.failures[host] = 0
+
+SESSION = create_session()
+BREAKER = CircuitBreaker()
+# Pool próprio para as consultas de IP, que também partem de threads do executor da extensão
+LOCATION_EXECUTOR = ThreadPoolExecutor(max_workers=2)
+
+def is_host_failure(e):
+    # Só timeouts e 5xx esgotados indicam host com problema; sem rede (DNS, conexão recusada),
+    # como logo após o login, não abre o circuito. Com o Retry, o requests embrulha a causa real
+    # em um MaxRetryError (ex.: timeout de leitura vira ConnectionError)
+    if isinstance(e, (requests.Timeout, requests.exceptions.RetryError)): return True
+    reason = getattr(e.args[0], "reason", None) if e.args else None
+    # NewConnectionError herda de ConnectTimeoutError: precisa ser excluído antes
+    if isinstance(reason, NewConnectionError): return False
+    return isinstance(reason, (ReadTimeoutError, ConnectTimeoutError, ResponseError))
+
+def get_response(session, url, params=None, timeout=HTTP_TIMEOUT):
+    # Host em falha recente: responde na hora em vez de esperar o timeout a cada tecla
+    host = urlsplit(url).hostname
+    if not BREAKER.allow(host):
+        logger.debug("Circuito aberto para %s", host)
+        return None
+    # Leituras interrompidas e 5xx já são repetidos pelo Retry do adapter
+    try:
+        r = session.get(url, params=params, timeout=timeout)
+    except requests.RequestException as e:
+        logger.debug("Falha na requisição %s: %s", url, e)
+        if is_host_failure(e): BREAKER.record(host, ok=False)
+        return None
+    BREAKER.record(host, ok=r.status_code < 500)
+    return r if r.status_code == 200 else None
+
+def decode_json(r):
+    # Decodifica direto dos bytes, sem passar pela decodificação de r.text; JSON inválido não é repetido
+    try:
+        return json_loads(r.content)
+    except ValueError as e:
+        logger.debug("Resposta inválida de %s: %s", r.url, e)
+        return None
+
+def get_json(session, url, params=None, timeout=HTTP_TIMEOUT):
+    r = get_response(session, url, params, timeout)
+    return decode_json(r) if r is not None else None
+
+def cache_max_age(r):
+    # Respeita o Cache-Control do servidor, sempre abaixo da janela de dados vencidos:
+    # senão o refresh em segundo plano nunca acontece antes do refresh bloqueante
+    match = MAX_AGE_RE.search(r.headers.get("Cache-Control", ""))
+    if not match: return CACHE_TTL
+    return min(max(int(match.group(1)), CACHE_MIN_TTL), CACHE_STALE_TTL - CACHE_MIN_TTL)
+
+def warm_dns(hosts):
+    # Deixa o cache de DNS do sistema aquecido antes da primeira consulta
+    for host in hosts:
+        try: socket.getaddrinfo(host, 443, type=socket.SOCK_STREAM)
+        except OSError: pass
+
+def to_fahrenheit(celsius):
+    return int(celsius * 1.8 + 32)
+
+Config = namedtuple("Config", "mode unit interface static_city")
+
+def read_config(preferences):
+    # Normaliza as preferências uma vez; só é refeito quando o Ulauncher as envia de novo
+    return Config(
+        mode=(preferences.get("location_mode") or "auto").lower(),
+        unit=(preferences.get("unit") or "c").lower(),
+        interface=(preferences.get("interface_mode") or "complete").lower(),
+        static_city=(preferences.get("static_location") or "").strip(),
+    )
+
+def weather_key(lat, lon, unit):
+    # 2 casas decimais (~1 km) bastam para o clima e aumentam os acertos no cache
+    return (round(lat, 2), round(lon, 2), unit)
+
 def get_system_language():
     try:
         lang = locale.getdefaultlocale()[0]
         return lang.replace("_", "-") if lang else "en-US"
-    except Exception:
+    except ValueError as e:
+        # Locale inválido no ambiente (ex.: LANG malformado)
+        logger.debug("Locale não reconhecido: %s", e)
         return "en-US"
 
+# Bandeira = par de indicadores regionais; as 676 combinações são montadas na importação
+COUNTRY_FLAGS = {
+    a + b: chr(ord(a) + 127397) + chr(ord(b) + 127397)
+    for a in string.ascii_uppercase for b in string.ascii_uppercase
+}
+
 def country_flag(code):
-    if not code or len(code) != 2: return ""
-    offset = 127397
-    return chr(ord(code[0].upper()) + offset) + chr(ord(code[1].upper()) + offset)
-
-OPEN_METEO_CODES = {
-    0: "céu limpo", 1: "parcialmente nublado", 2: "nublado", 3: "nublado",
-    45: "neblina", 48: "neblina com gelo", 51: "chuva fraca", 53: "chuva moderada",
-    55: "chuva forte", 56: "chuva congelante fraca", 57: "chuva congelante forte",
-    61: "chuva", 63: "chuva forte", 65: "chuva intensa", 66: "chuva congelante leve",
-    67: "chuva congelante intensa", 71: "neve fraca", 73: "neve moderada",
-    75: "neve intensa", 77: "granizo", 80: "chuva forte", 81: "chuva intensa",
-    82: "chuva intensa", 85: "neve leve", 86: "neve intensa", 95: "trovoada",
-    96: "trovoada com granizo", 99: "trovoada com granizo intenso"
+    return COUNTRY_FLAGS.get(code.upper(), "") if code else ""
+
+def load_translations():
+    # Lê translations/*.json uma única vez; as descrições já ficam indexadas pelo código WMO
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "translations")
+    translations = {}
+    try: names = os.listdir(path)
+    except OSError as e:
+        logger.error("Erro ao ler as traduções: %s", e)
+        return translations
+    for name in names:
+        if not name.endswith(".json"): continue
+        try:
+            with open(os.path.join(path, name), "r", encoding="utf-8") as f: data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error("Erro ao ler %s: %s", name, e)
+            continue
+        data["codes"] = {int(k.split(".")[1]): v for k, v in data.items() if k.startswith("weather_code.")}
+        translations[name[:-5]] = data
+    return translations
+
+TRANSLATIONS = load_translations()
+
+def get_translation(lang):
+    return TRANSLATIONS.get(lang.split("-")[0].lower()) or TRANSLATIONS.get("en") or {"codes": {}}
+
+# Ícone base por grupo de códigos WMO, expandido uma única vez na importação
+WEATHER_ICONS = {
+    code: icon
+    for codes, icon in (
+        ((0,), "weather-clear"),
+        ((1,), "weather-few-clouds-wind"),
+        ((2, 3), "weather-many-clouds"),
+        ((45, 48), "weather-mist"),
+        ((51, 53, 55, 56, 57, 61, 63, 65, 66, 67, 80, 81, 82), "weather-showers"),
+        ((71, 73, 75), "weather-snow-scattered"),
+        ((77, 85, 86), "weather-snow"),
+        ((95, 96, 99), "weather-storm"),
+    )
+    for code in codes
 }
 
+class TTLCache:
+    # Cache em memória limitado: cada entrada expira pelo seu TTL e, quando cheio, sai a menos usada
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, now):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None: return None
+            value, expires = entry
+            if now >= expires:
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl, now):
+        with self.lock:
+            self.entries[key] = (value, now + ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
 class WeatherService:
     @staticmethod
     def fetch_location(session):
-        apis = [("https://ip-api.com/json/", 2), ("https://freeipapi.com/api/json", 2)]
-        for url, timeout in apis:
-            try:
-                r = session.get(url, timeout=timeout)
-                if r.status_code == 200:
-                    data = r.json()
-                    return {
-                        "city": data.get("city") or data.get("cityName") or "Desconhecida",
-                        "state": data.get("regionName") or data.get("region") or "",
-                        "country": (data.get("countryCode") or data.get("country_code") or "BR")[:2],
-                        "latitude": data.get("lat") or data.get("latitude"),
-                        "longitude": data.get("lon") or data.get("longitude")
-                    }
-            except: continue
+        # Consulta os dois serviços ao mesmo tempo e fica com a primeira resposta válida
+        futures = [LOCATION_EXECUTOR.submit(get_json, session, url, timeout=IP_TIMEOUT) for url in IP_LOCATION_APIS]
+        for future in as_completed(futures):
+            geo = WeatherService.parse_location(future.result())
+            if geo:
+                for other in futures: other.cancel()
+                return geo
         return None
 
+    @staticmethod
+    def parse_location(data):
+        # ip-api.com e freeipapi.com usam nomes de campos diferentes
+        if not data or (data.get("lat") or data.get("latitude")) is None: return None
+        return {
+            "city": data.get("city") or data.get("cityName") or "Desconhecida",
+            "state": data.get("regionName") or data.get("region") or "",
+            "country": (data.get("countryCode") or data.get("country_code") or "BR")[:2],
+            "latitude": data.get("lat") or data.get("latitude"),
+            "longitude": data.get("lon") or data.get("longitude")
+        }
+
+    @staticmethod
+    def geocode(session, name, count=1):
+        # None indica falha na requisição; lista vazia, cidade não encontrada
+        data = get_json(session, GEOCODING_URL, params={"name": name, "count": count})
+        if data is None: return None
+        return [
+            {
+                "city": res.get("name"), "state": res.get("admin1", ""),
+                "country": res.get("country_code", "BR"),
+                "latitude": res.get("latitude"), "longitude": res.get("longitude")
+            } for res in data.get("results", [])
+        ]
+
     @staticmethod
     def fetch_weather(session, lat, lon, unit="c"):
+        r = get_response(session, FORECAST_URL.format(lat, lon))
+        data = decode_json(r) if r is not None else None
+        if data is None: return None
         try:
-            r = session.get(
-                f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}"
-                f"&daily=temperature_2m_max,temperature_2m_min,weathercode&current_weather=true&timezone=auto",
-                timeout=5
-            )
-            data = r.json()
+            # Escolhe a conversão uma vez, fora do laço
+            convert = to_fahrenheit if unit.lower() == "f" else int
             daily = data.get("daily", {})
+            # Uma única passada: lê máximas e mínimas lado a lado, já convertidas, até o terceiro dia
             forecast = [
-                {
-                    "max": int(daily["temperature_2m_max"][i]),
-                    "min": int(daily["temperature_2m_min"][i]),
-                } for i in range(min(3, len(daily.get("temperature_2m_max", []))))
+                {"max": convert(t_max), "min": convert(t_min)}
+                for t_max, t_min in islice(zip(daily.get("temperature_2m_max", []),
+                                               daily.get("temperature_2m_min", [])), 3)
             ]
-            
-            if unit.lower() == "f":
-                for f in forecast:
-                    f["max"] = int(f["max"] * 9/5 + 32)
-                    f["min"] = int(f["min"] * 9/5 + 32)
 
             current = data.get("current_weather", {})
-            temp = int(current.get("temperature", 0))
-            if unit.lower() == "f": temp = int(temp * 9/5 + 32)
+            code = current.get("weathercode", 0)
+            temp = convert(current.get("temperature", 0))
             
             return {
-                "current": {
-                    "temp": temp,
-                    "desc": OPEN_METEO_CODES.get(current.get("weathercode", 0), "desconhecido").lower(),
-                    "weathercode": current.get("weathercode", 0)
-                },
-                "forecast": forecast
+                "current": {"temp": temp, "weathercode": code},
+                "forecast": forecast,
+                "ttl": cache_max_age(r),
+                # Momento da busca (relógio de parede, pois vai para o disco): a idade do dado
+                # não pode ser renovada quando ele sai do cache em memória
+                "ts": time.time()
             }
-        except Exception: return None
+        except (KeyError, TypeError, ValueError) as e:
+            logger.error("Erro clima: %s", e)
+            return None
 
 class UWeather(Extension):
     def __init__(self):
         super().__init__()
         self.subscribe(KeywordQueryEvent, WeatherListener())
+        self.subscribe(PreferencesEvent, PreferencesLoadListener())
         self.subscribe(PreferencesUpdateEvent, PreferencesUpdateListener())
-        self.session = create_session()
+        self.session = SESSION
+        self.executor = ThreadPoolExecutor(max_workers=3)
         self.base_path = os.path.dirname(os.path.abspath(__file__))
+        self.config = read_config(self.preferences)
+        # As imagens não mudam em tempo de execução: lista o diretório uma única vez
+        images_dir = os.path.join(self.base_path, "images")
+        self.icons = {name: os.path.join(images_dir, name) for name in os.listdir(images_dir)}
+        self.default_icon = os.path.join(images_dir, "icon.png")
+        # O idioma do sistema não muda com a extensão aberta: escolhe a tradução uma vez
+        self.lang = get_system_language()
+        self.translation = get_translation(self.lang)
         self.cache = self.load_cache()
+        self.weather_cache = TTLCache(WEATHER_CACHE_SIZE)
+        self.geocode_cache = TTLCache(GEOCODE_CACHE_SIZE)
+        self.weather_icon_cache = {}
+        self.refresh_lock = threading.Lock()
+        self.inflight = {}
+        self.inflight_lock = threading.Lock()
+        self.ip_geo = None
+        self.ip_geo_expires = 0
+        threading.Thread(target=warm_dns, args=(WARM_HOSTS,), daemon=True).start()
+
+    def prefetch_location(self):
+        # Resolve a localização por IP antes da primeira consulta
+        if time.time() < self.ip_geo_expires: return
+        self.set_ip_geo(self.fetch_once("ip", WeatherService.fetch_location, self.session))
+
+    def set_ip_geo(self, geo):
+        if not geo: return
+        self.ip_geo, self.ip_geo_expires = geo, time.time() + GEO_TTL
         
     def load_cache(self):
         path = os.path.join(self.base_path, CACHE_FILE)
         if os.path.exists(path):
             try:
-                with open(path, "r", encoding="utf-8") as f: return json.load(f)
-            except: return {}
+                with open(path, "rb") as f: return json_loads(f.read())
+            except (OSError, ValueError) as e:
+                logger.error("Erro ao ler o cache: %s", e)
+                return {}
         return {}
 
     def save_cache(self):
         path = os.path.join(self.base_path, CACHE_FILE)
+        tmp_path = None
         try:
-            with open(path, "w", encoding="utf-8") as f: json.dump(self.cache, f)
-        except: pass
+            # Grava em um temporário exclusivo e renomeia: nunca deixa um cache pela metade,
+            # nem mistura escritas de um refresh em segundo plano e de uma atualização síncrona
+            fd, tmp_path = tempfile.mkstemp(prefix=CACHE_FILE + ".", suffix=".tmp", dir=self.base_path)
+            with os.fdopen(fd, "wb") as f: f.write(json_dumps(self.cache))
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.error("Erro ao salvar o cache: %s", e)
+            if tmp_path and os.path.exists(tmp_path):
+                try: os.remove(tmp_path)
+                except OSError: pass
+
+    def refresh_in_background(self):
+        if not self.refresh_lock.acquire(blocking=False): return
+        self.executor.submit(self.background_refresh)
+
+    def background_refresh(self):
+        try: self.update_location()
+        except Exception:
+            # Ninguém lê o Future do executor: sem isto, um bug aqui some em silêncio
+            logger.exception("Erro ao atualizar o clima em segundo plano")
+        finally: self.refresh_lock.release()
+
+    def fetch_once(self, key, fetch, *args):
+        # Chamadas simultâneas com a mesma chave compartilham uma única requisição
+        with self.inflight_lock:
+            future = self.inflight.get(key)
+            owner = future is None
+            if owner: future = self.inflight[key] = Future()
+        if not owner: return future.result()
+        try:
+            result = fetch(*args)
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.inflight_lock: del self.inflight[key]
+
+    def get_weather(self, lat, lon, unit, now=None):
+        if lat is None or lon is None: return None
+        # Cache em memória usa relógio monotônico (imune a ajustes do relógio do sistema)
+        if now is None: now = time.monotonic()
+        key = weather_key(lat, lon, unit)
+        weather = self.weather_cache.get(key, now)
+        # O relógio monotônico para durante a suspensão: confere também a idade real do dado
+        if weather and time.time() - weather["ts"] < weather["ttl"]: return weather
+        weather = self.fetch_once(key, WeatherService.fetch_weather, self.session, lat, lon, unit)
+        if weather:
+            self.weather_cache.set(key, weather, weather["ttl"], now)
+        return weather
+
+    def geocode(self, name, count=1):
+        # Coordenadas de uma cidade não mudam: buscas repetidas pulam direto para o clima
+        key = (name.lower(), count)
+        now = time.monotonic()
+        results = self.geocode_cache.get(key, now)
+        if results is not None: return results
+        # Teclas seguidas com a mesma busca compartilham a requisição em andamento
+        results = self.fetch_once(("geo",) + key, WeatherService.geocode, self.session, name, count)
+        # Cidade inexistente também fica em cache, por pouco tempo; falha de rede (None) não
+        if results is not None: self.geocode_cache.set(key, results, GEOCODE_TTL if results else GEOCODE_MISS_TTL, now)
+        return results
 
     def icon(self, filename):
-        path = os.path.join(self.base_path, "images", filename)
-        return path if os.path.exists(path) else os.path.join(self.base_path, "images", "icon.png")
+        return self.icons.get(filename, self.default_icon)
 
     # ===== NOVO: função de ícone baseada em clima e horário =====
     def weather_icon(self, weather_code, is_night=False):
-        code_map = {
-            0: "weather-clear",
-            1: "weather-few-clouds-wind",
-            2: "weather-many-clouds",
-            3: "weather-many-clouds",
-            45: "weather-mist",
-            48: "weather-mist",
-            51: "weather-showers",
-            53: "weather-showers",
-            55: "weather-showers",
-            56: "weather-showers",
-            57: "weather-showers",
-            61: "weather-showers",
-            63: "weather-showers",
-            65: "weather-showers",
-            66: "weather-showers",
-            67: "weather-showers",
-            71: "weather-snow-scattered",
-            73: "weather-snow-scattered",
-            75: "weather-snow-scattered",
-            77: "weather-snow",
-            80: "weather-showers",
-            81: "weather-showers",
-            82: "weather-showers",
-            85: "weather-snow",
-            86: "weather-snow",
-            95: "weather-storm",
-            96: "weather-storm",
-            99: "weather-storm",
-        }
-        base_name = code_map.get(weather_code, "weather-mist")
+        # O conjunto de imagens não muda: resolve cada (código, período) uma única vez
+        key = (weather_code, is_night)
+        if key not in self.weather_icon_cache:
+            self.weather_icon_cache[key] = self.resolve_weather_icon(weather_code, is_night)
+        return self.weather_icon_cache[key]
+
+    def resolve_weather_icon(self, weather_code, is_night):
+        base_name = WEATHER_ICONS.get(weather_code, "weather-mist")
         suffix = "night" if is_night else "day"
         filename = f"{base_name}-{suffix}.svg"
 
-        path = os.path.join(self.base_path, "images", filename)
-        if os.path.exists(path):
+        if filename in self.icons:
             return filename
         neutral_file = f"{base_name}.svg"
-        return neutral_file if os.path.exists(os.path.join(self.base_path, "images", neutral_file)) else "icon.png"
+        return neutral_file if neutral_file in self.icons else "icon.png"
     # ===============================================================
 
     def update_location(self):
-        mode = (self.preferences.get("location_mode") or "auto").lower()
-        unit = (self.preferences.get("unit") or "c").lower()
-        static_city = (self.preferences.get("static_location") or "").strip()
+        mode, unit, _, static_city = self.config
         geo = None
 
         if mode == "auto":
-            geo = WeatherService.fetch_location(self.session)
+            geo = self.ip_geo if time.time() < self.ip_geo_expires else None
+            if not geo:
+                # Enquanto o IP é resolvido, já busca o clima da última localização conhecida;
+                # se a região for a mesma, get_weather abaixo reaproveita essa requisição
+                last = self.cache.get("data", {}).get("geo") if self.cache.get("params", {}).get("mode") == "auto" else None
+                if last: self.executor.submit(self.get_weather, last["latitude"], last["longitude"], unit)
+                geo = self.fetch_once("ip", WeatherService.fetch_location, self.session)
+                self.set_ip_geo(geo)
         else:
             if not static_city: return False
-            try:
-                r = self.session.get("https://geocoding-api.open-meteo.com/v1/search",
-                                    params={"name": static_city, "count": 1}, timeout=5)
-                res = r.json().get("results", [])
-                if res:
-                    geo = {
-                        "city": res[0].get("name"), "state": res[0].get("admin1", ""),
-                        "country": res[0].get("country_code", "BR"),
-                        "latitude": res[0].get("latitude"), "longitude": res[0].get("longitude")
-                    }
-            except: pass
+            results = self.geocode(static_city, count=1)
+            if results: geo = results[0]
 
         if geo:
-            weather = WeatherService.fetch_weather(self.session, geo["latitude"], geo["longitude"], unit)
+            weather = self.get_weather(geo["latitude"], geo["longitude"], unit)
             if weather:
                 self.cache = {
                     "params": {"mode": mode, "unit": unit, "city": static_city},
-                    "data": {"geo": geo, "weather": weather, "ts": time.time()}
+                    "data": {"geo": geo, "weather": weather}
                 }
                 self.save_cache()
                 return True
         return False
 
+class PreferencesLoadListener(EventListener):
+    def on_event(self, event, extension):
+        # Preferências disponíveis na inicialização: aquece o cache antes da primeira consulta.
+        # Lê do próprio evento: o listener do Ulauncher que atualiza extension.preferences pode não ter rodado ainda
+        extension.config = read_config(event.preferences)
+        # Localização por IP só interessa no modo automático; o refresh abaixo compartilha a mesma requisição
+        if extension.config.mode == "auto":
+            threading.Thread(target=extension.prefetch_location, daemon=True).start()
+        data = extension.cache.get("data")
+        if not data or time.time() - data["weather"].get("ts", 0) > data["weather"].get("ttl", CACHE_TTL):
+            extension.refresh_in_background()
+
 class PreferencesUpdateListener(EventListener):
     def on_event(self, event, extension):
+        extension.config = read_config(dict(extension.preferences, **{event.id: event.new_value}))
         extension.cache = {}
         path = os.path.join(extension.base_path, CACHE_FILE)
         if os.path.exists(path):
             try: os.remove(path)
-            except: pass
+            except OSError as e: logger.error("Erro ao remover o cache: %s", e)
         extension.update_location()
 
 class WeatherListener(EventListener):
     def on_event(self, event, extension):
-        unit = (extension.preferences.get("unit") or "c").lower()
-        mode = (extension.preferences.get("location_mode") or "auto").lower()
-        interface = (extension.preferences.get("interface_mode") or "complete").lower()
-        static_city = (extension.preferences.get("static_location") or "").strip()
+        mode, unit, interface, static_city = extension.config
         query = (event.get_argument() or "").strip()
+        T = extension.translation
 
         if mode == "manual" and not static_city:
-            return RenderResultListAction([ExtensionResultItem(icon=extension.icon("error.png"), name="Localização não encontrada", on_enter=None)])
+            return RenderResultListAction([ExtensionResultItem(icon=extension.icon("error.png"), name=T.get("location_not_found", ""), on_enter=None)])
 
         if not query:
+            cache = extension.cache
             cache_valid = False
-            if "params" in extension.cache:
-                p = extension.cache["params"]
+            if "params" in cache:
+                p = cache["params"]
                 if p.get("mode") == mode and p.get("unit") == unit and p.get("city") == static_city:
                     cache_valid = True
 
-            if not cache_valid or (time.time() - extension.cache["data"]["ts"] > CACHE_TTL):
+            age = time.time() - cache["data"]["weather"].get("ts", 0) if cache_valid else None
+            if age is None or age > CACHE_STALE_TTL:
                 success = extension.update_location()
                 if not success:
-                    return RenderResultListAction([ExtensionResultItem(icon=extension.icon("icon.png"), name="Buscando informações meteorológicas...", on_enter=None)])
+                    return RenderResultListAction([ExtensionResultItem(icon=extension.icon("icon.png"), name=T.get("searching_weather", ""), on_enter=None)])
+                cache = extension.cache
+            elif age > cache["data"]["weather"].get("ttl", CACHE_TTL):
+                # Dado vencido mas utilizável: mostra na hora e atualiza em segundo plano
+                extension.refresh_in_background()
             
-            return self.render(extension.cache["data"], extension, interface)
+            return self.render(cache["data"], extension, interface)
 
         return self.search_city_weather(query, extension, unit, interface)
 
     def search_city_weather(self, query, extension, unit, interface):
         try:
-            r = extension.session.get("https://geocoding-api.open-meteo.com/v1/search",
-                                     params={"name": query, "count": 3}, timeout=5)
-            results = r.json().get("results", [])
+            T = extension.translation
+            results = extension.geocode(query, count=3)
+            if results is None:
+                return RenderResultListAction([ExtensionResultItem(icon=extension.icon("error.png"), name=T.get("search_error", ""), on_enter=None)])
             if not results:
-                return RenderResultListAction([ExtensionResultItem(icon=extension.icon("icon.png"), name="Cidade não encontrada", on_enter=None)])
+                return RenderResultListAction([ExtensionResultItem(icon=extension.icon("icon.png"), name=T.get("city_not_found", ""), on_enter=None)])
 
             items = []
-            for res in results:
-                weather = WeatherService.fetch_weather(extension.session, res["latitude"], res["longitude"], unit)
+            now = time.monotonic()
+            # As previsões de cada cidade são independentes: dispara todas de uma vez
+            futures = [extension.executor.submit(extension.get_weather, geo["latitude"], geo["longitude"], unit, now)
+                       for geo in results]
+            # Não espera a cidade mais lenta: mostra o que chegou dentro do prazo
+            # (as demais continuam em segundo plano e ficam no cache para a próxima consulta)
+            done, _ = wait(futures, timeout=SEARCH_TIMEOUT)
+            if not done: done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for geo, future in zip(results, futures):
+                if future not in done: continue
+                weather = future.result()
                 if weather:
-                    geo = {"city": res.get("name"), "state": res.get("admin1", ""), "country": res.get("country_code", "BR"),
-                           "latitude": res.get("latitude"), "longitude": res.get("longitude")}
                     item_data = {"geo": geo, "weather": weather}
                     items.append(self.render(item_data, extension, interface, return_item=True))
             return RenderResultListAction(items)
-        except:
-            return RenderResultListAction([ExtensionResultItem(icon=extension.icon("error.png"), name="Erro na busca", on_enter=None)])
+        except Exception:
+            # Falhas de rede já viram None em get_response: o que chega aqui é bug, então registra o traceback
+            logger.exception("Erro na busca por %s", query)
+            return RenderResultListAction([ExtensionResultItem(icon=extension.icon("error.png"), name=extension.translation.get("search_error", ""), on_enter=None)])
 
     def render(self, item_data, extension, interface_mode, return_item=False):
         geo, weather = item_data["geo"], item_data["weather"]
-        lang = get_system_language()
-        url = f"https://weather.com/{lang}/weather/today/l/{geo['latitude']},{geo['longitude']}"
-        temp, desc = weather["current"]["temp"], weather["current"]["desc"].lower()
+        url = f"https://weather.com/{extension.lang}/weather/today/l/{round(geo['latitude'], 4)},{round(geo['longitude'], 4)}"
+        T = extension.translation
+        temp = weather["current"]["temp"]
+        weather_code = weather["current"].get("weathercode", 0)
+        desc = T["codes"].get(weather_code, "")
         flag = country_flag(geo["country"])
         
-        now_hour = datetime.now().hour
+        now_hour = time.localtime().tm_hour
         is_night = now_hour < 6 or now_hour >= 18
-        weather_code = weather["current"].get("weathercode", 0)
         icon_file = extension.weather_icon(weather_code, is_night)
 
         state_info = f", {geo['state']}" if geo['state'] else ""
@@ -284,7 +601,7 @@ class WeatherListener(EventListener):
 
         if interface_mode == "complete":
             f = weather.get("forecast", [])
-            line3 = f"Amanhã: {f[1]['min']}º / {f[1]['max']}º | Depois: {f[2]['min']}º / {f[2]['max']}º" if len(f) >= 3 else ""
+            line3 = f"{T.get('tomorrow', '')}: {f[1]['min']}º / {f[1]['max']}º | {T.get('day_after', '')}: {f[2]['min']}º / {f[2]['max']}º" if len(f) >= 3 else ""
             item = ExtensionResultItem(
                 icon=extension.icon(icon_file), 
                 name=loc_line, 